@@ -1,21 +1,590 @@
 import argparse
+import functools
+import hashlib
+import json
 import logging
 import os
+import shutil
+import struct
 import sys
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-import geopandas as gpd
+import h5py
 import numpy as np
+import pyogrio
+import pyogrio.raw
 import xarray as xr
-from flask import Flask, jsonify, render_template, request, send_from_directory
+from flask import Flask, Request, Response, current_app, jsonify, render_template, request, send_from_directory
+from flask.json.provider import JSONProvider
 from flask_compress import Compress
+from pyproj import CRS, Transformer
+from waitress import serve
 from werkzeug.utils import secure_filename
 
+try:
+    import orjson
+
+    HAS_ORJSON = True
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+except ImportError:
+    HAS_ORJSON = False
+    ORJSON_OPTIONS = 0
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# NetCDF files are opened lazily in blocks of time steps so that resampling runs as a dask graph
+# and only the reduced result is ever materialized
+NETCDF_CHUNKS = {"time": 200, "feature_id": -1}
+
+# Copy buffer for saving uploads; Werkzeug's 16 KB default means tens of thousands of small writes
+# for a multi-hundred-MB NetCDF file
+UPLOAD_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Requests larger than this spool their files inside the upload folder, see UploadRequest
+UPLOAD_SPOOL_MIN_SIZE = 500 * 1024
+UPLOAD_SPOOL_PREFIX = ".upload-"
+
+# Spool files are created 0600; renamed uploads get the mode file.save would have given them.
+# Reading the umask means setting it, so do it once at import rather than per request thread
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+UPLOAD_FILE_MODE = 0o666 & ~_UMASK
+
+# Number of matrix values encoded per chunk of a streamed JSON response
+STREAM_BLOCK_VALUES = 256 * 1024
+
+# HDF5 raw chunk cache for each NetCDF variable, see _open_netcdf (slots should be a prime ~100x the
+# number of chunks that fit in the cache)
+HDF5_CHUNK_CACHE_BYTES = 128 * 1024 * 1024
+HDF5_CHUNK_CACHE_SLOTS = 1_000_003
+
+# Accepted names for the flow variable, in order of preference
+FLOW_VARIABLES = ("flow", "streamflow", "q", "discharge")
+
+# Variables sent alongside flow when present in the NetCDF file
+OPTIONAL_VARIABLES = ("velocity", "depth")
+
+# Coarse resample intervals offered by the timeline (daily, weekly, monthly); they are computed in
+# the background after the first request for a NetCDF file has loaded it, see _prepare_netcdf
+PRESET_RESAMPLE_HOURS = (24, 168, 730)
+
+# Serializes swapping a finished Zarr store into place, see _write_sorted_store
+_SORTED_STORE_LOCK = threading.Lock()
+
+# (path, mtime_ns) of every NetCDF file whose background preparation has been started
+_PREPARED_NETCDF = set()
+_PREPARED_NETCDF_LOCK = threading.Lock()
+
+
+def _open_netcdf(path):
+    """Open a NetCDF file with dask-backed variables
+
+    HDF5's default 1 MB per-dataset chunk cache is far smaller than a block of our time chunks, so
+    compressed chunks would be decoded repeatedly; enlarge it when h5py opens the file. h5netcdf
+    only reads NetCDF4/HDF5 files, so NetCDF3 (classic) files go through netCDF4 instead.
+    """
+    if not h5py.is_hdf5(path):
+        return xr.open_dataset(path, chunks=NETCDF_CHUNKS, engine="netcdf4")
+    return xr.open_dataset(
+        path,
+        chunks=NETCDF_CHUNKS,
+        engine="h5netcdf",
+        driver_kwds={"rdcc_nbytes": HDF5_CHUNK_CACHE_BYTES, "rdcc_nslots": HDF5_CHUNK_CACHE_SLOTS},
+    )
+
+
+class DatasetError(ValueError):
+    """Raised when an input file lacks the dimensions or variables the visualizer needs"""
+
+
+def _feature_stats(matrix):
+    """Per-feature min/max/mean of a (time, feature_id) matrix, ignoring NaNs"""
+    valid = ~np.isnan(matrix)
+    counts = valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid, matrix, 0).sum(axis=0, dtype=np.float64) / counts
+    stats = {
+        "min": np.fmin.reduce(matrix, axis=0),
+        "max": np.fmax.reduce(matrix, axis=0),
+        "mean": mean.astype(matrix.dtype),
+    }
+    for values in stats.values():
+        values.flags.writeable = False
+    return stats
+
+
+def _sorted_dataset(ds, variables=OPTIONAL_VARIABLES):
+    """Validate a streamflow dataset and lazily reduce it to sorted (time, feature_id) variables
+
+    Only flow and the given optional variables are kept. Returns the dataset and the name of its
+    flow variable.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("NetCDF dimensions: %s", dict(ds.sizes))
+
+    if "time" not in ds.dims:
+        raise DatasetError("Time dimension not found in NetCDF")
+
+    if "feature_id" not in ds.dims:
+        raise DatasetError("feature_id dimension not found in NetCDF")
+
+    # Find flow variable
+    flow_var = next((var for var in FLOW_VARIABLES if var in ds.variables), None)
+    if not flow_var:
+        raise DatasetError("Flow variable not found")
+
+    logger.info("Using flow variable: %s", flow_var)
+
+    # Drop every variable we don't send so resampling and reads skip them
+    ds = ds[[var for var in (flow_var, *variables) if var in ds.variables]]
+
+    # float32 keeps far more precision than the map can show and halves memory, cache and payload size
+    # for files stored as float64; the cast is lazy and NaNs survive it
+    ds = ds.astype(np.float32, copy=False)
+
+    # Normalize to (time, feature_id); on dask arrays the transpose is only metadata
+    ds = ds.transpose("time", "feature_id", ...)
+
+    # Sort feature IDs once; flow, velocity and depth all share the same permutation. The gather runs
+    # per time chunk across worker threads, so compute() reads the data straight into its final order
+    # without an extra full-size copy. Sorted stores skip it entirely.
+    feature_ids = ds["feature_id"].values
+    if np.any(feature_ids[1:] < feature_ids[:-1]):
+        ds = ds.isel(feature_id=np.argsort(feature_ids, kind="stable"))
+    return ds, flow_var
+
+
+def _sorted_store_path(nc_path):
+    """Location of the sorted Zarr copy of a NetCDF file, see _write_sorted_store"""
+    return Path(nc_path).with_suffix(".zarr")
+
+
+def _open_sorted_store(nc_path, mtime_ns):
+    """Open the sorted Zarr copy of a NetCDF file, or return None if there is no up-to-date copy"""
+    store = _sorted_store_path(nc_path)
+    if not store.is_dir():
+        return None
+    try:
+        ds = xr.open_zarr(store, chunks=NETCDF_CHUNKS)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable Zarr store %s: %s", store, e)
+        return None
+    if ds.attrs.get("source_mtime_ns") != mtime_ns:
+        ds.close()
+        return None
+    return ds
+
+
+def _write_sorted_store(nc_path):
+    """Save a NetCDF file as a Zarr store with its features already sorted and time chunked
+
+    Later loads of the same file read the store instead and skip the sort and the HDF5 decode. The
+    store records the source mtime so a replaced NetCDF never pairs with a stale copy, and it is
+    written under a temporary name so readers only ever see a complete store.
+    """
+    nc_path = Path(nc_path)
+    store = _sorted_store_path(nc_path)
+    partial = store.with_name(f"{store.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    start_time = time.time()
+    try:
+        mtime_ns = os.stat(nc_path).st_mtime_ns
+        existing = _open_sorted_store(nc_path, mtime_ns)
+        if existing is not None:
+            existing.close()
+            logger.info("Sorted Zarr store %s is up to date", store)
+            return
+        with _open_netcdf(nc_path) as source:
+            ds, _ = _sorted_dataset(source)
+            ds = ds.chunk({"time": NETCDF_CHUNKS["time"], "feature_id": -1})
+            for var in ds.variables.values():
+                var.encoding.pop("chunks", None)
+                var.encoding.pop("preferred_chunks", None)
+            ds = ds.assign_attrs(source_mtime_ns=mtime_ns)
+            ds.to_zarr(partial, mode="w", consolidated=True, zarr_format=2)
+        with _SORTED_STORE_LOCK:
+            if store.exists():
+                shutil.rmtree(store)
+            os.replace(partial, store)
+        logger.info("Wrote sorted Zarr store %s in %.2fs", store, time.time() - start_time)
+    except Exception:
+        logger.exception("Could not write sorted Zarr store for %s", nc_path)
+        shutil.rmtree(partial, ignore_errors=True)
+
+
+def _prepare_netcdf(nc_path, mtime_ns):
+    """Write the sorted Zarr copy of a NetCDF file, then resample it at the timeline's preset intervals
+
+    The resampled arrays land in the _load_netcdf_arrays cache, so switching the timeline to daily,
+    weekly or monthly is a lookup instead of a full read and reduction. The resamples read the store
+    written just before, and stop once the file has been replaced.
+    """
+    _write_sorted_store(nc_path)
+    for resample_hours in PRESET_RESAMPLE_HOURS:
+        try:
+            if os.stat(nc_path).st_mtime_ns != mtime_ns:
+                return
+            _netcdf_arrays(nc_path, resample_hours)
+        except Exception:
+            logger.exception("Could not precompute %sh resample of %s", resample_hours, nc_path)
+            return
+
+
+def _start_netcdf_preparation(nc_path):
+    """Run _prepare_netcdf on a background thread, once per version of the file
+
+    Call this only after the request's own load has returned: the preparation decodes the whole file
+    again, and running both at once makes them take turns on the HDF5 lock.
+    """
+    key = (str(nc_path), os.stat(nc_path).st_mtime_ns)
+    with _PREPARED_NETCDF_LOCK:
+        if key in _PREPARED_NETCDF:
+            return
+        _PREPARED_NETCDF.add(key)
+    threading.Thread(target=_prepare_netcdf, args=key, name="prepare-netcdf", daemon=True).start()
+
+
+@functools.lru_cache(maxsize=8)
+def _load_netcdf_arrays(path, mtime_ns, resample_hours, variables):
+    """Open, resample and sort a NetCDF file into (time, feature_id) matrices
+
+    mtime_ns is only part of the cache key, so rewriting the file invalidates its entries. Optional
+    variables not listed in variables are never read and come back as None. The returned arrays are
+    shared between requests and are marked read-only.
+    """
+    logger.info("Processing NetCDF %s (resample=%sh)", path, resample_hours)
+    source = _open_sorted_store(path, mtime_ns)
+    if source is None:
+        source = _open_netcdf(path)
+    else:
+        logger.info("Reading sorted Zarr store for %s", path)
+    try:
+        ds, flow_var = _sorted_dataset(source, variables)
+
+        # Apply resampling if requested; with flox installed xarray reduces all bins of a time chunk in
+        # one vectorized pass instead of one dask task per bin
+        if resample_hours > 1:
+            ds = ds.resample(time=f"{resample_hours}h").mean()
+
+        compute_start = time.time()
+        ds = ds.compute()
+        logger.info("Read, reorder and resample completed in %.2fs", time.time() - compute_start)
+
+        def sorted_matrix(var):
+            # C-contiguous (time, feature_id) so every consumer (JSON encoder, binary packer)
+            # walks it with stride-1 access
+            if var not in ds.variables:
+                return None
+            matrix = np.ascontiguousarray(ds[var].transpose("time", "feature_id").values)
+            matrix.flags.writeable = False
+            return matrix
+
+        result = {
+            "time_steps": np.datetime_as_string(ds["time"].values, unit="s").tolist(),
+            "feature_ids": ds["feature_id"].values,
+            "flow": sorted_matrix(flow_var),
+            "velocity": sorted_matrix("velocity"),
+            "depth": sorted_matrix("depth"),
+        }
+        result["feature_ids"].flags.writeable = False
+        result["feature_ids_json"] = _json_fragment(result["feature_ids"])
+        return result
+    finally:
+        source.close()
+
+
+def _netcdf_arrays(path, resample_hours, variables=OPTIONAL_VARIABLES):
+    """Return the processed arrays for a NetCDF file, reusing cached results while it is unchanged"""
+    return _load_netcdf_arrays(str(path), os.stat(path).st_mtime_ns, resample_hours, tuple(variables))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_flow_stats(path, mtime_ns, resample_hours, variables):
+    """Per-feature flow statistics of the matching _load_netcdf_arrays entry
+
+    Kept in a cache of their own because only read_netcdf sends them.
+    """
+    return _feature_stats(_load_netcdf_arrays(path, mtime_ns, resample_hours, variables)["flow"])
+
+
+def _netcdf_flow_stats(path, resample_hours, variables=OPTIONAL_VARIABLES):
+    """Return the flow statistics for a NetCDF file, reusing cached results while it is unchanged"""
+    return _load_flow_stats(str(path), os.stat(path).st_mtime_ns, resample_hours, tuple(variables))
+
+
+@functools.lru_cache(maxsize=32)
+def _wgs84_transformer(crs):
+    """Transformer from crs to EPSG:4326, or None if crs already is EPSG:4326
+
+    Building a Transformer means a PROJ database lookup, so each source CRS is only resolved once.
+    """
+    if CRS.from_user_input(crs).to_epsg() == 4326:
+        return None
+    return Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_geopackage_summary(path, mtime_ns):
+    """Read the flowpaths layer of a GeoPackage, return its WGS84 bounds and sorted feature IDs
+
+    Geometries are never parsed: the bounds come from the layer extent and only the id column is read.
+    """
+    info = pyogrio.read_info(path, layer="flowpaths", force_total_bounds=True)
+    bounds = [float(v) for v in info["total_bounds"]]
+
+    # Reproject the extent to EPSG:4326 (GeoJSON standard); densified edges keep the box enclosing
+    # the layer even though straight edges in the source CRS are curved in lon/lat
+    transformer = _wgs84_transformer(info["crs"]) if info["crs"] is not None else None
+    if transformer is not None:
+        bounds = list(transformer.transform_bounds(*bounds, densify_pts=21))
+
+    # Get sorted feature IDs for consistent ordering; the raw reader returns plain numpy columns
+    # without building a (Geo)DataFrame
+    _, _, _, (ids,) = pyogrio.raw.read(path, layer="flowpaths", columns=["id"], read_geometry=False)
+    return {"bounds": bounds, "feature_ids": np.sort(ids).tolist()}
+
+
+def _geopackage_summary(path):
+    """Return bounds and feature IDs for a GeoPackage, reusing cached results while it is unchanged"""
+    return _load_geopackage_summary(str(path), os.stat(path).st_mtime_ns)
+
+
+def _load_pair(gpkg_path, nc_path, resample_hours):
+    """Load a GeoPackage summary and NetCDF arrays concurrently
+
+    The two files are independent and both readers spend most of their time outside the GIL (GDAL,
+    HDF5 decompression, numpy), so the combined load takes about as long as the slower file.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        summary = executor.submit(_geopackage_summary, gpkg_path)
+        nc = executor.submit(_netcdf_arrays, nc_path, resample_hours)
+        return summary.result(), nc.result()
+
+
+def _netcdf_metadata(nc, resample_hours):
+    """Describe processed NetCDF arrays without the matrices themselves"""
+    return {
+        "time_steps": nc["time_steps"],
+        "feature_ids": nc["feature_ids_json"],
+        "num_times": len(nc["time_steps"]),
+        "num_features": len(nc["feature_ids"]),
+        "resample_hours": resample_hours,
+    }
+
+
+def _netcdf_response(nc, resample_hours, quantize=False):
+    """Build the JSON "netcdf" payload from processed NetCDF arrays"""
+    return {
+        **_netcdf_metadata(nc, resample_hours),
+        # Matrices are shaped (time, feature_id)
+        **{
+            name: None if nc[name] is None else _encode_matrix(nc[name], quantize)
+            for name in ("flow", "velocity", "depth")
+        },
+        "quantized": quantize,
+    }
+
+
+def _json_array(arr):
+    """Prepare a numpy array for the JSON encoder
+
+    orjson walks C-contiguous arrays natively without boxing every value into a Python object,
+    so only fall back to nested lists when the stdlib encoder is in use.
+    """
+    if HAS_ORJSON:
+        return np.ascontiguousarray(arr)
+    return arr.tolist()
+
+
+def _json_fragment(arr):
+    """Encode an array once for embedding unchanged in every response that sends it
+
+    With orjson this is an orjson.Fragment, which the encoder copies verbatim; otherwise the nested
+    lists the stdlib encoder needs.
+    """
+    if HAS_ORJSON:
+        return orjson.Fragment(orjson.dumps(arr, option=ORJSON_OPTIONS))
+    return arr.tolist()
+
+
+def _encode_matrix(arr, quantize=False):
+    """Prepare a (time, feature_id) matrix for the response, optionally quantized to int16
+
+    Quantized matrices are sent as {"scale": float, "data": int16 matrix}; clients recover the
+    values with data * scale. NaNs are sent as 0.
+    """
+    if not quantize:
+        return _json_array(arr)
+
+    peak = max(abs(float(np.nanmax(arr))), abs(float(np.nanmin(arr)))) if arr.size else 0.0
+    scale = peak / 32767 if np.isfinite(peak) and peak > 0 else 1.0
+
+    # Scale, round and clean NaNs in a single scratch buffer rather than allocating a new matrix per step
+    scaled = np.divide(arr, scale, out=np.empty_like(arr, dtype=np.result_type(arr, np.float32)))
+    np.rint(scaled, out=scaled)
+    np.nan_to_num(scaled, copy=False)
+    return {"scale": scale, "data": _json_array(scaled.astype(np.int16))}
+
+
+def _dumps(obj):
+    """Encode obj as UTF-8 JSON bytes"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=ORJSON_OPTIONS)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _iter_json(obj):
+    """Encode obj as JSON in pieces so large responses can be streamed
+
+    2D numpy arrays are emitted in blocks of about STREAM_BLOCK_VALUES values, so neither the full
+    encoded payload nor a second copy of the response tree ever has to sit in memory.
+    """
+    if isinstance(obj, dict):
+        yield b"{"
+        for i, (key, value) in enumerate(obj.items()):
+            yield (b"," if i else b"") + _dumps(key) + b":"
+            yield from _iter_json(value)
+        yield b"}"
+    elif isinstance(obj, np.ndarray) and obj.ndim == 2:
+        rows_per_block = max(1, STREAM_BLOCK_VALUES // max(1, obj.shape[1]))
+        yield b"["
+        for start in range(0, obj.shape[0], rows_per_block):
+            block = b",".join(_dumps(row) for row in obj[start : start + rows_per_block])
+            yield (b"," if start else b"") + block
+        yield b"]"
+    else:
+        yield _dumps(obj)
+
+
+def _stream_json(obj):
+    """Build a streamed JSON response for obj"""
+    return Response(_iter_json(obj), mimetype="application/json")
+
+
+def _pack_binary(header, matrices):
+    """Pack a JSON header and (time, feature_id) matrices into a single binary payload
+
+    Layout: little-endian uint32 header length, UTF-8 JSON header (space padded so the matrix data
+    starts on a 4-byte boundary), then each matrix as raw little-endian float32. The byte offset of
+    each matrix relative to the start of the data is stored in header["netcdf"]["offsets"], None for
+    missing matrices.
+    """
+    offsets = {}
+    offset = 0
+    for name, matrix in matrices.items():
+        if matrix is None:
+            offsets[name] = None
+            continue
+        offsets[name] = offset
+        offset += matrix.size * 4
+
+    netcdf = dict(header["netcdf"], dtype="float32", offsets=offsets)
+    header_bytes = _dumps(dict(header, netcdf=netcdf))
+    header_bytes += b" " * (-(4 + len(header_bytes)) % 4)
+
+    payload = bytearray(struct.pack("<I", len(header_bytes)))
+    payload += header_bytes
+    for matrix in matrices.values():
+        if matrix is not None:
+            payload += np.ascontiguousarray(matrix, dtype="<f4").data
+    return bytes(payload)
+
+
+def _with_etag(response, etag):
+    """Mark a response as cacheable only after revalidating its ETag"""
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, max-age=0, must-revalidate"
+    return response
+
+
+def _not_modified(etag):
+    """Build an empty 304 response for a client that already holds etag"""
+    return _with_etag(Response(status=304), etag)
+
+
+class UploadRequest(Request):
+    """Request that spools large uploaded files inside the upload folder
+
+    Werkzeug spools them to the system temp directory and saving copies every byte a second time; a
+    spool file on the same filesystem is renamed into place instead, see _save_upload. Spool files
+    that were not moved are removed when the request ends.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spool_paths = []
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is None or total_content_length < UPLOAD_SPOOL_MIN_SIZE:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        spool = tempfile.NamedTemporaryFile(
+            dir=current_app.config["UPLOAD_FOLDER"], prefix=UPLOAD_SPOOL_PREFIX, delete=False
+        )
+        self.spool_paths.append(spool.name)
+        return spool
+
+
+def _stream_size(stream):
+    """Length of a file object's contents, leaving it rewound"""
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    return size
+
+
+def _stream_digest(stream):
+    """blake2b digest of a file object's contents, leaving it rewound"""
+    digest = hashlib.blake2b(digest_size=16)
+    stream.seek(0)
+    while chunk := stream.read(UPLOAD_BUFFER_SIZE):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=8)
+def _load_file_digest(path, mtime_ns):
+    """Digest of a saved file; mtime_ns is only part of the cache key, see _file_digest"""
+    with open(path, "rb") as f:
+        return _stream_digest(f)
+
+
+def _file_digest(path):
+    """Return the digest of a saved file, reusing the cached value while it is unchanged"""
+    return _load_file_digest(str(path), os.stat(path).st_mtime_ns)
+
+
+def _save_upload(file, dest):
+    """Save an uploaded file to dest, renaming its spool file into place when it has one"""
+    spool = getattr(file.stream, "name", None)
+    if isinstance(spool, str) and spool in request.spool_paths:
+        file.stream.flush()
+        os.replace(spool, dest)
+        os.chmod(dest, UPLOAD_FILE_MODE)
+    else:
+        file.save(dest, buffer_size=UPLOAD_BUFFER_SIZE)
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, which encodes large numeric payloads much faster than stdlib json"""
+
+    option = ORJSON_OPTIONS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Skip the bytes -> str -> bytes round trip that the default implementation does
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.option), mimetype="application/json")
+
 
 def create_app(data_folder=None):
     """Application factory for creating Flask app instance"""
@@ -28,6 +597,9 @@ def create_app(data_folder=None):
         template_folder=str(package_dir / "templates"),
         static_folder=str(package_dir / "static"),
     )
+    app.request_class = UploadRequest
+    if HAS_ORJSON:
+        app.json = OrjsonProvider(app)
 
     # Configuration
     app.config["UPLOAD_FOLDER"] = "uploads"
@@ -42,18 +614,32 @@ def create_app(data_folder=None):
         "text/javascript",
         "application/json",
         "application/javascript",
+        "application/octet-stream",
     ]
-    app.config["COMPRESS_LEVEL"] = 6  # Balance between speed and compression ratio (1-9)
+    # Prefer zstd/brotli, which compress numeric JSON several times faster than gzip at a similar
+    # ratio; fast levels keep compression from dominating the large NetCDF responses. Streamed
+    # responses use their own list, whose default has no gzip, so give clients without zstd/brotli
+    # the same gzip/deflate fallback there
+    app.config["COMPRESS_ALGORITHM"] = ["zstd", "br", "gzip"]
+    app.config["COMPRESS_ALGORITHM_STREAMING"] = ["zstd", "br", "gzip", "deflate"]
+    app.config["COMPRESS_ZSTD_LEVEL"] = 3
+    app.config["COMPRESS_BR_LEVEL"] = 1
+    app.config["COMPRESS_LEVEL"] = 1  # gzip
+    app.config["COMPRESS_DEFLATE_LEVEL"] = 1
     app.config["COMPRESS_MIN_SIZE"] = 500  # Only compress responses larger than 500 bytes
 
     # Initialize compression
     Compress(app)
-    logger.info("Flask-Compress enabled with gzip compression")
+    logger.info("Flask-Compress enabled with %s compression", ", ".join(app.config["COMPRESS_ALGORITHM"]))
 
     # Ensure upload directory exists
     uploads_path = Path(app.config["UPLOAD_FOLDER"])
     uploads_path.mkdir(exist_ok=True)
 
+    # The combined endpoints always read this pair of files
+    gpkg_path = uploads_path / "uploaded.gpkg"
+    nc_path = uploads_path / "uploaded.nc"
+
     # If data folder is provided, symlink files into uploads
     if data_folder:
         data_path = Path(data_folder).resolve()
@@ -65,6 +651,8 @@ def create_app(data_folder=None):
         for file_path in uploads_path.iterdir():
             if file_path.is_file() or file_path.is_symlink():
                 file_path.unlink()
+            elif file_path.is_dir():
+                shutil.rmtree(file_path)
 
         # Find GeoPackage file in config/
         gpkg_files = list((data_path / "config").glob("*.gpkg"))
@@ -82,17 +670,20 @@ def create_app(data_folder=None):
         nc_source = max(nc_files, key=lambda p: p.stat().st_mtime)
 
         # Create symlinks
-        gpkg_link = uploads_path / "uploaded.gpkg"
-        nc_link = uploads_path / "uploaded.nc"
-
-        gpkg_link.symlink_to(gpkg_source.resolve())
-        nc_link.symlink_to(nc_source.resolve())
+        gpkg_path.symlink_to(gpkg_source.resolve())
+        nc_path.symlink_to(nc_source.resolve())
 
-        print(f"Linked {gpkg_source} -> {gpkg_link}")
-        print(f"Linked {nc_source} -> {nc_link}")
+        print(f"Linked {gpkg_source} -> {gpkg_path}")
+        print(f"Linked {nc_source} -> {nc_path}")
 
         app.config["AUTO_LOADED"] = True
 
+    @app.teardown_request
+    def remove_upload_spools(exc):
+        """Delete spool files of uploads that were not saved"""
+        for path in request.spool_paths:
+            Path(path).unlink(missing_ok=True)
+
     def allowed_file(filename):
         """Check if the file extension is allowed"""
         return os.path.splitext(filename)[1].lower() in app.config["ALLOWED_EXTENSIONS"]
@@ -124,7 +715,7 @@ def create_app(data_folder=None):
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
                 filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-                file.save(filepath)
+                _save_upload(file, filepath)
                 uploaded_files.append({"filename": filename, "size": os.path.getsize(filepath)})
             else:
                 return jsonify({"error": f"Invalid file type: {file.filename}"}), 400
@@ -143,7 +734,7 @@ def create_app(data_folder=None):
 
     @app.route("/api/netcdf/<filename>", methods=["GET"])
     def read_netcdf(filename):
-        """Read and process NetCDF file, return JSON data"""
+        """Read and process NetCDF file, return per-feature flow statistics (and all data with ?full=1)"""
         try:
             filepath = os.path.join(app.config["UPLOAD_FOLDER"], secure_filename(filename))
 
@@ -152,100 +743,74 @@ def create_app(data_folder=None):
 
             # Get resample parameter from query string (in hours)
             resample_hours = request.args.get("resample", default=1, type=int)
+            quantize = request.args.get("quantize", default=0, type=int) > 0
+
+            full = request.args.get("full", default=0, type=int) > 0
+
+            # Statistics only need flow; ?vars=flow,depth limits which matrices a full response reads
+            if not full:
+                variables = ()
+            elif "vars" in request.args:
+                requested = request.args["vars"].split(",")
+                variables = tuple(var for var in OPTIONAL_VARIABLES if var in requested)
+            else:
+                variables = OPTIONAL_VARIABLES
+
+            nc = _netcdf_arrays(filepath, resample_hours, variables)
+            stats = _netcdf_flow_stats(filepath, resample_hours, variables)
+            flow_stats = {name: _json_array(values) for name, values in stats.items()}
+
+            if full and request.args.get("format") == "binary":
+                header = {"netcdf": {**_netcdf_metadata(nc, resample_hours), "flow_stats": flow_stats}}
+                payload = _pack_binary(header, {name: nc[name] for name in ("flow", *OPTIONAL_VARIABLES)})
+                return Response(payload, mimetype="application/octet-stream")
 
-            # Open NetCDF file with xarray
-            ds = xr.open_dataset(filepath)
-
-            # Get time dimension
-            if "time" not in ds.dims:
-                return jsonify({"error": "Time dimension not found in NetCDF"}), 400
-
-            # Get feature_id dimension
-            if "feature_id" not in ds.dims:
-                return jsonify({"error": "feature_id dimension not found in NetCDF"}), 400
-
-            # Find flow variable
-            flow_var = None
-            for var_name in ["flow", "streamflow", "q", "discharge"]:
-                if var_name in ds.variables:
-                    flow_var = var_name
-                    break
-
-            if not flow_var:
-                return jsonify({"error": "Flow variable not found"}), 400
-
-            # Apply resampling if requested
-            if resample_hours > 1:
-                # Resample using xarray's resample method
-                freq_str = f"{resample_hours}H"
-                ds = ds.resample(time=freq_str).mean()
-
-            # Extract data
-            # Note: data is shaped (feature_id, time), need to transpose for (time, feature_id)
-            time_data = ds["time"].values
-            feature_ids_raw = ds["feature_id"].values
-
-            # Sort feature IDs and create index mapping using numpy for efficiency
-            sort_indices = np.argsort(feature_ids_raw)
-            feature_ids_sorted = feature_ids_raw[sort_indices].tolist()
-
-            # Reorder data according to sorted feature IDs
-            # Check actual dimension order from xarray
-            flow_dims = ds[flow_var].dims
-
-            if flow_dims[0] == "feature_id":
-                # Shape is (feature_id, time) - need to transpose
-                flow_data_sorted = ds[flow_var].values[sort_indices, :]
-                flow_transposed = flow_data_sorted.T.tolist()
+            # By default only send per-feature flow statistics; the full matrices are opt-in and
+            # single features can be fetched from the timeseries endpoint
+            if full:
+                response = _netcdf_response(nc, resample_hours, quantize)
             else:
-                # Shape is (time, feature_id) - already correct order
-                flow_data_sorted = ds[flow_var].values[:, sort_indices]
-                flow_transposed = flow_data_sorted.tolist()
-
-            # Convert time to ISO format strings
-            time_strings = [str(t) for t in time_data]
-
-            # Also get velocity and depth if available, with same sorting
-            velocity_transposed = None
-            depth_transposed = None
-
-            if "velocity" in ds.variables:
-                velocity_dims = ds["velocity"].dims
-                if velocity_dims[0] == "feature_id":
-                    velocity_data_sorted = ds["velocity"].values[sort_indices, :]
-                    velocity_transposed = velocity_data_sorted.T.tolist()
-                else:
-                    velocity_data_sorted = ds["velocity"].values[:, sort_indices]
-                    velocity_transposed = velocity_data_sorted.tolist()
-
-            if "depth" in ds.variables:
-                depth_dims = ds["depth"].dims
-                if depth_dims[0] == "feature_id":
-                    depth_data_sorted = ds["depth"].values[sort_indices, :]
-                    depth_transposed = depth_data_sorted.T.tolist()
-                else:
-                    depth_data_sorted = ds["depth"].values[:, sort_indices]
-                    depth_transposed = depth_data_sorted.tolist()
-
-            feature_ids = feature_ids_sorted
-
-            # Close dataset
-            ds.close()
-
-            # Format response
+                response = _netcdf_metadata(nc, resample_hours)
+            response["flow_stats"] = flow_stats
+
+            return _stream_json(response)
+
+        except DatasetError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": f"Error processing NetCDF file: {str(e)}"}), 500
+
+    @app.route("/api/netcdf/<filename>/timeseries/<int:feature_id>", methods=["GET"])
+    def read_netcdf_timeseries(filename, feature_id):
+        """Return the flow/velocity/depth time series of a single feature"""
+        try:
+            filepath = os.path.join(app.config["UPLOAD_FOLDER"], secure_filename(filename))
+
+            if not os.path.exists(filepath):
+                return jsonify({"error": "File not found"}), 404
+
+            resample_hours = request.args.get("resample", default=1, type=int)
+            nc = _netcdf_arrays(filepath, resample_hours)
+
+            # feature_ids are sorted, so the column can be found by bisection
+            index = int(np.searchsorted(nc["feature_ids"], feature_id))
+            if index == len(nc["feature_ids"]) or nc["feature_ids"][index] != feature_id:
+                return jsonify({"error": f"Feature not found: {feature_id}"}), 404
+
             response = {
-                "time_steps": time_strings,
-                "feature_ids": feature_ids,
-                "flow": flow_transposed,  # shape: (time, feature_id)
-                "velocity": velocity_transposed,
-                "depth": depth_transposed,
-                "num_times": len(time_strings),
-                "num_features": len(feature_ids),
+                "feature_id": feature_id,
+                "time_steps": nc["time_steps"],
+                **{
+                    name: None if nc[name] is None else _json_array(nc[name][:, index])
+                    for name in ("flow", "velocity", "depth")
+                },
                 "resample_hours": resample_hours,
             }
 
             return jsonify(response)
 
+        except DatasetError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": f"Error processing NetCDF file: {str(e)}"}), 500
 
@@ -258,20 +823,9 @@ def create_app(data_folder=None):
             if not os.path.exists(filepath):
                 return jsonify({"error": "File not found"}), 404
 
-            # Read GeoPackage with geopandas
-            gdf = gpd.read_file(filepath, layer="flowpaths")
+            summary = _geopackage_summary(filepath)
 
-            # Reproject to Web Mercator (EPSG:4326 for GeoJSON standard)
-            if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
-                gdf = gdf.to_crs(epsg=4326)
-
-            # Get bounding box [minx, miny, maxx, maxy]
-            bounds = gdf.total_bounds.tolist()
-
-            # Get feature IDs and sort them to ensure consistent ordering
-            feature_ids = sorted(gdf["id"].tolist())
-
-            return jsonify({"bounds": bounds, "feature_ids": feature_ids, "count": len(feature_ids)})
+            return jsonify({**summary, "count": len(summary["feature_ids"])})
 
         except Exception as e:
             return jsonify({"error": f"Error processing GeoPackage file: {str(e)}"}), 500
@@ -287,135 +841,57 @@ def create_app(data_folder=None):
             gpkg_file = request.files["gpkg"]
             nc_file = request.files["nc"]
             resample_hours = int(request.form.get("resample", 1))
+            quantize = int(request.form.get("quantize", 0)) > 0
+
+            # Re-uploading the current pair keeps the saved files, so their mtimes and with them the cached
+            # arrays, the sorted Zarr copy and the ETag stay valid. Sizes are compared first, so only
+            # uploads whose sizes match the saved files are hashed
+            unchanged = all(
+                path.exists()
+                and os.path.getsize(path) == _stream_size(file.stream)
+                and _stream_digest(file.stream) == _file_digest(path)
+                for file, path in ((gpkg_file, gpkg_path), (nc_file, nc_path))
+            )
 
             # Clear uploads folder before saving new files
             uploads_dir = Path(app.config["UPLOAD_FOLDER"])
-            if uploads_dir.exists():
+            if unchanged:
+                logger.info("Uploaded files match %s and %s, keeping them", gpkg_path, nc_path)
+            elif uploads_dir.exists():
                 # Delete all files in uploads folder
                 for file_path in uploads_dir.iterdir():
-                    if file_path.name == ".gitkeep":
+                    # Keep the spool files holding this request's uploads
+                    if file_path.name == ".gitkeep" or file_path.name.startswith(UPLOAD_SPOOL_PREFIX):
                         continue
                     if file_path.is_file():
                         file_path.unlink()
+                    elif file_path.is_dir():
+                        shutil.rmtree(file_path)
             else:
                 uploads_dir.mkdir(parents=True, exist_ok=True)
 
-            # Save files to uploads folder
-            gpkg_path = uploads_dir / "uploaded.gpkg"
-            nc_path = uploads_dir / "uploaded.nc"
-
             # Save the uploaded file content
-            gpkg_file.save(str(gpkg_path))
-            nc_file.save(str(nc_path))
-
-            # Process GeoPackage
-            gdf = gpd.read_file(gpkg_path, layer="flowpaths")
-            if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
-                gdf = gdf.to_crs(epsg=4326)
-
-            # Get bounding box and feature IDs (sorted)
-            bounds = gdf.total_bounds.tolist()
-            feature_ids_gpkg = sorted(gdf["id"].tolist())
-
-            # Process NetCDF
-            ds = xr.open_dataset(nc_path)
-
-            if "time" not in ds.dims:
-                return jsonify({"error": "Time dimension not found in NetCDF"}), 400
-
-            if "feature_id" not in ds.dims:
-                return jsonify({"error": "feature_id dimension not found in NetCDF"}), 400
-
-            # Find flow variable
-            flow_var = None
-            for var_name in ["flow", "streamflow", "q", "discharge"]:
-                if var_name in ds.variables:
-                    flow_var = var_name
-                    break
-
-            if not flow_var:
-                return jsonify({"error": "Flow variable not found"}), 400
-
-            # Apply resampling if requested
-            if resample_hours > 1:
-                freq_str = f"{resample_hours}H"
-                ds = ds.resample(time=freq_str).mean()
-
-            # Extract data
-            time_data = ds["time"].values
-            feature_ids_raw = ds["feature_id"].values
-
-            # Sort feature IDs and create index mapping using numpy for efficiency
-            sort_indices = np.argsort(feature_ids_raw)
-            feature_ids_sorted = feature_ids_raw[sort_indices].tolist()
-
-            print(f"DEBUG: feature_ids_raw shape: {feature_ids_raw.shape}")
-            print(f"DEBUG: sort_indices shape: {sort_indices.shape}, max: {sort_indices.max()}")
-
-            # Reorder data according to sorted feature IDs
-            # Check actual dimension order from xarray
-            flow_dims = ds[flow_var].dims
-            print(f"DEBUG: flow dimensions: {flow_dims}, shape: {ds[flow_var].shape}")
-
-            if flow_dims[0] == "feature_id":
-                # Shape is (feature_id, time) - need to transpose
-                flow_data_sorted = ds[flow_var].values[sort_indices, :]
-                flow_transposed = flow_data_sorted.T.tolist()
-            else:
-                # Shape is (time, feature_id) - already correct order
-                flow_data_sorted = ds[flow_var].values[:, sort_indices]
-                flow_transposed = flow_data_sorted.tolist()
-
-            # Convert time to ISO format strings
-            time_strings = [str(t) for t in time_data]
-
-            # Get velocity and depth if available, with same sorting
-            velocity_transposed = None
-            depth_transposed = None
-
-            if "velocity" in ds.variables:
-                velocity_dims = ds["velocity"].dims
-                if velocity_dims[0] == "feature_id":
-                    velocity_data_sorted = ds["velocity"].values[sort_indices, :]
-                    velocity_transposed = velocity_data_sorted.T.tolist()
-                else:
-                    velocity_data_sorted = ds["velocity"].values[:, sort_indices]
-                    velocity_transposed = velocity_data_sorted.tolist()
-
-            if "depth" in ds.variables:
-                depth_dims = ds["depth"].dims
-                if depth_dims[0] == "feature_id":
-                    depth_data_sorted = ds["depth"].values[sort_indices, :]
-                    depth_transposed = depth_data_sorted.T.tolist()
-                else:
-                    depth_data_sorted = ds["depth"].values[:, sort_indices]
-                    depth_transposed = depth_data_sorted.tolist()
-
-            feature_ids = feature_ids_sorted
-
-            ds.close()
+            if not unchanged:
+                _save_upload(gpkg_file, gpkg_path)
+                _save_upload(nc_file, nc_path)
+
+            summary, nc = _load_pair(gpkg_path, nc_path, resample_hours)
+            _start_netcdf_preparation(nc_path)
 
             # Return combined response
             response = {
-                "geopackage": {"bounds": bounds, "feature_ids": feature_ids_gpkg, "count": len(feature_ids_gpkg)},
-                "netcdf": {
-                    "time_steps": time_strings,
-                    "feature_ids": feature_ids,
-                    "flow": flow_transposed,
-                    "velocity": velocity_transposed,
-                    "depth": depth_transposed,
-                    "num_times": len(time_strings),
-                    "num_features": len(feature_ids),
-                    "resample_hours": resample_hours,
-                },
+                "geopackage": {**summary, "count": len(summary["feature_ids"])},
+                "netcdf": _netcdf_response(nc, resample_hours, quantize),
                 "files": {
                     "geopackage": Path(gpkg_file.filename).name,
                     "netcdf": Path(nc_file.filename).name,
                 },
             }
 
-            return jsonify(response)
+            return _stream_json(response)
 
+        except DatasetError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": f"Error processing files: {str(e)}"}), 500
 
@@ -428,190 +904,81 @@ def create_app(data_folder=None):
 
         # Get resample parameter from query string (in hours)
         resample_hours = request.args.get("resample", default=1, type=int)
-        logger.info(f"Resample parameter: {resample_hours} hours")
-
-        # Get folder path from query parameter, default to current working directory
-        data_folder = Path("./uploads")
-        nc_file = data_folder / "uploaded.nc"
-        gpkg_file = data_folder / "uploaded.gpkg"
-
-        if not data_folder.exists():
-            logger.error(f"Folder not found: {data_folder}")
-            return jsonify({"error": f"Folder not found: {data_folder}"}), 404
-
-        if not gpkg_file.exists():
-            logger.error(f"No GeoPackage file found: {gpkg_file}")
-            return jsonify({"error": f"No GeoPackage file found {gpkg_file}"}), 404
-
-        if not nc_file.exists():
-            logger.error(f"No NetCDF file found: {nc_file}")
-            return jsonify({"error": f"No NetCDF file found {nc_file}"}), 404
-
-        logger.info(f"Loading GeoPackage: {gpkg_file}")
-        gpkg_start = time.time()
-
-        # Read GeoPackage
-        gdf = gpd.read_file(gpkg_file, layer="flowpaths")
-        logger.info(f"GeoPackage loaded in {time.time() - gpkg_start:.2f}s - {len(gdf)} features")
-
-        reproject_start = time.time()
-        if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
-            gdf = gdf.to_crs(epsg=4326)
-            logger.info(f"Reprojection completed in {time.time() - reproject_start:.2f}s")
-
-        # Get bounding box and feature IDs (sorted)
-        bounds = gdf.total_bounds.tolist()
-        feature_ids_gpkg = sorted(gdf["id"].tolist())
-        logger.info(f"Processed {len(feature_ids_gpkg)} feature IDs from GeoPackage")
-
-        # Read NetCDF
-        logger.info(f"Loading NetCDF: {nc_file}")
-        nc_start = time.time()
-        ds = xr.open_dataset(nc_file)
-        logger.info(f"NetCDF opened in {time.time() - nc_start:.2f}s")
-        logger.info(f"NetCDF dimensions: {dict(ds.dims)}")
-        logger.info(f"NetCDF variables: {list(ds.variables.keys())}")
-
-        if "time" not in ds.dims:
-            logger.error("Time dimension not found in NetCDF")
-            return jsonify({"error": "Time dimension not found in NetCDF"}), 400
-
-        if "feature_id" not in ds.dims:
-            logger.error("feature_id dimension not found in NetCDF")
-            return jsonify({"error": "feature_id dimension not found in NetCDF"}), 400
-
-        # Find flow variable
-        flow_var = None
-        for var_name in ["flow", "streamflow", "q", "discharge"]:
-            if var_name in ds.variables:
-                flow_var = var_name
-                break
-
-        if not flow_var:
-            logger.error("Flow variable not found in NetCDF")
-            return jsonify({"error": "Flow variable not found"}), 400
-
-        logger.info(f"Using flow variable: {flow_var}")
-
-        # Apply resampling if requested
-        if resample_hours > 1:
-            logger.info(f"Starting resample to {resample_hours}H")
-            resample_start = time.time()
-            freq_str = f"{resample_hours}H"
-            ds = ds.resample(time=freq_str).mean().compute()
-            logger.info(f"Resampling completed in {time.time() - resample_start:.2f}s")
-            logger.info(f"New dimensions after resample: {dict(ds.dims)}")
-
-        # Extract data
-        logger.info("Extracting time and feature_id data")
-        extract_start = time.time()
-        time_data = ds["time"].values
-        feature_ids_raw = ds["feature_id"].values
+        quantize = request.args.get("quantize", default=0, type=int) > 0
+        output_format = request.args.get("format", default="json")
+        logger.info("Resample parameter: %s hours", resample_hours)
+
+        if not uploads_path.exists():
+            logger.error("Folder not found: %s", uploads_path)
+            return jsonify({"error": f"Folder not found: {uploads_path}"}), 404
+
+        if not gpkg_path.exists():
+            logger.error("No GeoPackage file found: %s", gpkg_path)
+            return jsonify({"error": f"No GeoPackage file found {gpkg_path}"}), 404
+
+        if not nc_path.exists():
+            logger.error("No NetCDF file found: %s", nc_path)
+            return jsonify({"error": f"No NetCDF file found {nc_path}"}), 404
+
+        # The uploads only change when re-uploaded, so their mtimes identify the response. The ETag is weak
+        # because Flask-Compress rewrites strong ETags with the chosen encoding
+        etag_key = (
+            f"{nc_path.stat().st_mtime_ns}:{gpkg_path.stat().st_mtime_ns}:{resample_hours}:{quantize}:{output_format}"
+        )
+        etag = hashlib.blake2b(etag_key.encode(), digest_size=16).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            logger.info("ETag matched, returning 304 in %.2fs", time.time() - start_time)
+            return _not_modified(etag)
+
+        logger.info("Loading GeoPackage %s and NetCDF %s", gpkg_path, nc_path)
+        load_start = time.time()
+        try:
+            summary, nc = _load_pair(gpkg_path, nc_path, resample_hours)
+        except DatasetError as e:
+            logger.error(str(e))
+            return jsonify({"error": str(e)}), 400
+        _start_netcdf_preparation(nc_path)
         logger.info(
-            f"Extracted {len(time_data)} time steps and {len(feature_ids_raw)} feature IDs in {time.time() - extract_start:.2f}s"
+            "Processed %d feature IDs and %d time steps in %.2fs",
+            len(summary["feature_ids"]),
+            len(nc["time_steps"]),
+            time.time() - load_start,
         )
 
-        # Sort feature IDs and create index mapping using numpy for efficiency
-        logger.info("Sorting feature IDs")
-        sort_start = time.time()
-        sort_indices = np.argsort(feature_ids_raw)
-        feature_ids_sorted = feature_ids_raw[sort_indices].tolist()
-        logger.info(f"Feature ID sorting completed in {time.time() - sort_start:.2f}s")
-
-        # Reorder data according to sorted feature IDs
-        # Check actual dimension order from xarray
-        flow_dims = ds[flow_var].dims
-        logger.info(f"Flow variable dimensions: {flow_dims}, shape: {ds[flow_var].shape}")
-
-        logger.info("Extracting and reordering flow data")
-        flow_start = time.time()
-        if flow_dims[0] == "feature_id":
-            # Shape is (feature_id, time) - need to transpose
-            flow_data_sorted = ds[flow_var].values[sort_indices, :]
-            flow_transposed = flow_data_sorted.T.tolist()
-        else:
-            # Shape is (time, feature_id) - already correct order
-            flow_data_sorted = ds[flow_var].values[:, sort_indices]
-            flow_transposed = flow_data_sorted.tolist()
-        logger.info(f"Flow data extraction and conversion to list completed in {time.time() - flow_start:.2f}s")
-
-        # Convert time to ISO format strings
-        logger.info("Converting time data to ISO strings")
-        time_start = time.time()
-        time_strings = [str(t) for t in time_data]
-        logger.info(f"Time conversion completed in {time.time() - time_start:.2f}s")
-
-        # Get velocity and depth if available, with same sorting
-        velocity_transposed = None
-        depth_transposed = None
-
-        if "velocity" in ds.variables:
-            logger.info("Extracting velocity data")
-            velocity_start = time.time()
-            velocity_dims = ds["velocity"].dims
-            if velocity_dims[0] == "feature_id":
-                velocity_data_sorted = ds["velocity"].values[sort_indices, :]
-                velocity_transposed = velocity_data_sorted.T.tolist()
-            else:
-                velocity_data_sorted = ds["velocity"].values[:, sort_indices]
-                velocity_transposed = velocity_data_sorted.tolist()
-            logger.info(f"Velocity data extraction completed in {time.time() - velocity_start:.2f}s")
-
-        if "depth" in ds.variables:
-            logger.info("Extracting depth data")
-            depth_start = time.time()
-            depth_dims = ds["depth"].dims
-            if depth_dims[0] == "feature_id":
-                depth_data_sorted = ds["depth"].values[sort_indices, :]
-                depth_transposed = depth_data_sorted.T.tolist()
-            else:
-                depth_data_sorted = ds["depth"].values[:, sort_indices]
-                depth_transposed = depth_data_sorted.tolist()
-            logger.info(f"Depth data extraction completed in {time.time() - depth_start:.2f}s")
+        geopackage_data = {**summary, "count": len(summary["feature_ids"])}
+        files = {
+            "geopackage": str(gpkg_path.name),
+            "netcdf": str(nc_path.name),
+        }
 
-        feature_ids = feature_ids_sorted
-
-        ds.close()
-        logger.info("NetCDF dataset closed")
+        if output_format == "binary":
+            logger.info("Building binary response")
+            response_start = time.time()
+            payload = _pack_binary(
+                {"geopackage": geopackage_data, "netcdf": _netcdf_metadata(nc, resample_hours), "files": files},
+                {"flow": nc["flow"], "velocity": nc["velocity"], "depth": nc["depth"]},
+            )
+            logger.info("Response built in %.2fs", time.time() - response_start)
+            logger.info("Response size (uncompressed): %.2f MB", len(payload) / 1024 / 1024)
+            logger.info("TOTAL REQUEST TIME: %.2fs", time.time() - start_time)
+            logger.info("=" * 80)
+            return _with_etag(Response(payload, mimetype="application/octet-stream"), etag)
 
         # Return combined response
         logger.info("Building JSON response")
         response_start = time.time()
         response = {
-            "geopackage": {"bounds": bounds, "feature_ids": feature_ids_gpkg, "count": len(feature_ids_gpkg)},
-            "netcdf": {
-                "time_steps": time_strings,
-                "feature_ids": feature_ids,
-                "flow": flow_transposed,
-                "velocity": velocity_transposed,
-                "depth": depth_transposed,
-                "num_times": len(time_strings),
-                "num_features": len(feature_ids),
-                "resample_hours": resample_hours,
-            },
-            "files": {
-                "geopackage": str(gpkg_file.name),
-                "netcdf": str(nc_file.name),
-            },
+            "geopackage": geopackage_data,
+            "netcdf": _netcdf_response(nc, resample_hours, quantize),
+            "files": files,
         }
-        logger.info(f"Response built in {time.time() - response_start:.2f}s")
-
-        # Create JSON response
-        json_response = jsonify(response)
-
-        # Log response size (before compression)
-        import json as json_module
 
-        response_json_str = json_module.dumps(response)
-        uncompressed_size = len(response_json_str.encode("utf-8"))
-        logger.info(f"Response size (uncompressed): {uncompressed_size / 1024 / 1024:.2f} MB")
-        logger.info("Compression enabled: gzip will compress before sending to client")
-
-        total_time = time.time() - start_time
-        logger.info(f"TOTAL REQUEST TIME: {total_time:.2f}s")
+        # Matrices are encoded lazily while the response is being sent
+        logger.info("Response built in %.2fs, streaming JSON", time.time() - response_start)
+        logger.info("TOTAL REQUEST TIME (before streaming): %.2fs", time.time() - start_time)
         logger.info("=" * 80)
 
-        return json_response
+        return _with_etag(_stream_json(response), etag)
 
     return app
 
@@ -627,12 +994,19 @@ def main():
     )
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind to (default: 0.0.0.0)")
     parser.add_argument("--port", type=int, default=5000, help="Port to bind to (default: 5000)")
-    parser.add_argument("--debug", action="store_true", help="Enable debug mode")
+    parser.add_argument(
+        "--threads", type=int, default=8, help="Worker threads serving requests concurrently (default: 8)"
+    )
+    parser.add_argument("--debug", action="store_true", help="Enable debug mode (Flask development server)")
 
     args = parser.parse_args()
 
     app = create_app(data_folder=args.data_folder)
-    app.run(debug=args.debug, host=args.host, port=args.port)
+    if args.debug:
+        app.run(debug=True, host=args.host, port=args.port)
+    else:
+        # The NetCDF and GeoPackage readers release the GIL, so threads serve requests in parallel
+        serve(app, host=args.host, port=args.port, threads=args.threads)
 
 
 if __name__ == "__main__":
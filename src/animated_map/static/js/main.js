@@ -169,7 +169,7 @@ async function loadLocalFiles(folderPath = null) {
 
   try {
     // Build URL with parameters
-    let url = `/api/load-local-files?resample=${timelineResampleInterval}`;
+    let url = `/api/load-local-files?resample=${timelineResampleInterval}&format=binary`;
     if (folderPath) {
       url += `&folder=${encodeURIComponent(folderPath)}`;
     }
@@ -197,14 +197,14 @@ async function loadLocalFiles(folderPath = null) {
       throw new Error(error.error || "Failed to load local files");
     }
 
-    console.log("Parsing JSON response");
+    console.log("Parsing binary response");
     const parseStart = performance.now();
-    const data = await response.json();
+    const buffer = await response.arrayBuffer();
+    const data = parseBinaryPayload(buffer);
     const parseTime = performance.now() - parseStart;
 
-    // Calculate uncompressed size (approximate)
-    const dataSize = new Blob([JSON.stringify(data)]).size;
-    console.log(`JSON parsing completed in ${(parseTime / 1000).toFixed(2)}s`);
+    const dataSize = buffer.byteLength;
+    console.log(`Binary parsing completed in ${(parseTime / 1000).toFixed(2)}s`);
     console.log(
       `Uncompressed data size: ${(dataSize / 1024 / 1024).toFixed(2)} MB`,
     );
@@ -239,6 +239,35 @@ async function loadLocalFiles(folderPath = null) {
   }
 }
 
+// Decode a ?format=binary payload: uint32 header length, JSON header, then float32 matrices.
+// Each matrix row is exposed as a Float32Array view over the response buffer (no copies).
+function parseBinaryPayload(buffer) {
+  const headerLength = new DataView(buffer).getUint32(0, true);
+  const header = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)),
+  );
+  const dataOffset = 4 + headerLength;
+  const netcdf = header.netcdf;
+  const { num_times: numTimes, num_features: numFeatures } = netcdf;
+
+  for (const [name, offset] of Object.entries(netcdf.offsets)) {
+    if (offset === null) {
+      netcdf[name] = null;
+      continue;
+    }
+    const values = new Float32Array(
+      buffer,
+      dataOffset + offset,
+      numTimes * numFeatures,
+    );
+    netcdf[name] = Array.from({ length: numTimes }, (_, t) =>
+      values.subarray(t * numFeatures, (t + 1) * numFeatures),
+    );
+  }
+
+  return header;
+}
+
 async function fetchGeoPackageData(filename) {
   const response = await fetch(`/api/geopackage/${filename}`);
 
@@ -260,7 +289,7 @@ async function fetchGeoPackageData(filename) {
 
 async function fetchNetCDFData(filename) {
   const response = await fetch(
-    `/api/netcdf/${filename}?resample=${timelineResampleInterval}`,
+    `/api/netcdf/${filename}?resample=${timelineResampleInterval}&full=1&format=binary`,
   );
 
   if (!response.ok) {
@@ -268,14 +297,14 @@ async function fetchNetCDFData(filename) {
     throw new Error(error.error || "Failed to fetch NetCDF data");
   }
 
-  const data = await response.json();
+  const data = parseBinaryPayload(await response.arrayBuffer()).netcdf;
 
   // Process the data from the server
   timeSteps = data.time_steps;
   const featureIds = data.feature_ids;
-  const flowDataArray = data.flow; // shape: (time, feature_id)
-  const velocityDataArray = data.velocity;
-  const depthDataArray = data.depth;
+  const flowDataArray = dequantize(data.flow); // shape: (time, feature_id)
+  const velocityDataArray = dequantize(data.velocity);
+  const depthDataArray = dequantize(data.depth);
 
   // Organize data by time and feature
   flowData = {};
@@ -339,6 +368,13 @@ async function fetchNetCDFData(filename) {
   );
 }
 
+// Expand an int16-quantized matrix ({scale, data}) back to float rows
+function dequantize(matrix) {
+  if (!matrix || Array.isArray(matrix)) return matrix;
+  const { scale, data } = matrix;
+  return data.map((row) => Float32Array.from(row, (v) => v * scale));
+}
+
 // Unified function to process NetCDF data and setup visualization
 function processDataAndVisualize(geopackageData, netcdfData, fileNames) {
   console.log("--- processDataAndVisualize start ---");
@@ -375,9 +411,9 @@ function processDataAndVisualize(geopackageData, netcdfData, fileNames) {
 
   timeSteps = netcdfData.time_steps;
   const netcdfFeatureIds = netcdfData.feature_ids;
-  const flowDataArray = netcdfData.flow;
-  const velocityDataArray = netcdfData.velocity;
-  const depthDataArray = netcdfData.depth;
+  const flowDataArray = dequantize(netcdfData.flow);
+  const velocityDataArray = dequantize(netcdfData.velocity);
+  const depthDataArray = dequantize(netcdfData.depth);
   const numTimes = netcdfData.num_times;
   const numFeatures = netcdfData.num_features;
 